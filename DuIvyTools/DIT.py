@@ -8,8 +8,6 @@ This file is provided to you under GPLv2 License.
 
 
 import sys
-from DuIvyTools.XPM import xpm_call_functions
-from DuIvyTools.XVG import xvg_call_functions
 from DuIvyTools.NDX import ndx_call_functions
 from DuIvyTools.MDP import mdp_call_functions
 from DuIvyTools.HELP import help_call_functions
@@ -54,9 +52,17 @@ Type `dit help` for more informations.
             exit()
     elif len(sys.argv) > 3:
         method = sys.argv[1]
+        ## import XVG and XPM only when needed, they load numpy and matplotlib
         if method.startswith("xvg"):
+            from DuIvyTools.XVG import xvg_call_functions
+
             xvg_call_functions(arguments)
         elif method.startswith("xpm"):
+            from DuIvyTools.XPM import xpm_call_functions
+            from DuIvyTools.XVG import _configure_plot
+
+            ## xpm figures are drawn with the plot params of XVG on top of XPM's
+            _configure_plot()
             xpm_call_functions(arguments)
         elif method.startswith("ndx"):
             ndx_call_functions(arguments)
@@ -57,27 +57,27 @@ class NDX(object):
             print("Error -> no {} in current directory".format(ndxfile))
             exit()
 
-        ## parse the content of ndxfile
+        ## parse the content of ndxfile line by line
         with open(ndxfile, "r") as fo:
-            lines = [line.strip() for line in fo.readlines()]
-        for line_id, line in enumerate(lines):
-            if line == "":
-                continue
-            elif line[0] == "[" and line[-1] == "]":
-                self.group_name_list.append(line[1:-1].strip())
-                self.group_number += 1
-            elif (not "[" in line) and (not "]" in line):
-                if len(self.group_name_list) - 1 == len(self.group_index_list):
-                    self.group_index_list.append([int(i) for i in line.split()])
-                elif len(self.group_name_list) == len(self.group_index_list):
-                    self.group_index_list[-1] += [int(i) for i in line.split()]
+            for line_id, line in enumerate(fo):
+                line = line.strip()
+                if line == "":
+                    continue
+                elif line[0] == "[" and line[-1] == "]":
+                    self.group_name_list.append(line[1:-1].strip())
+                    self.group_number += 1
+                elif (not "[" in line) and (not "]" in line):
+                    if len(self.group_name_list) - 1 == len(self.group_index_list):
+                        self.group_index_list.append([int(i) for i in line.split()])
+                    elif len(self.group_name_list) == len(self.group_index_list):
+                        self.group_index_list[-1] += [int(i) for i in line.split()]
+                    else:
+                        print("Error -> check your index file, one group", end="")
+                        print("name should be followed by some index number")
+                        exit()
                 else:
-                    print("Error -> check your index file, one group", end="")
-                    print("name should be followed by some index number")
+                    print("Error -> a weired line appears at line {}".format(line_id))
                     exit()
-            else:
-                print("Error -> a weired line appears at line {}".format(line_id))
-                exit()
         if not (
             self.group_number == len(self.group_name_list) == len(self.group_index_list)
         ):
@@ -148,71 +148,69 @@ class XPM(object):
         self.xpm_yaxis = []
         self.xpm_datalines = []
 
-        ## read xpm file
-        with open(xpmfile, "r") as fo:
-            lines = [line.strip() for line in fo.readlines()]
-
-        ## parse content of xpmfile
+        ## read and parse content of xpmfile line by line
         flag_4_code = 0  ## means haven't detected yet
-        for line in lines:
-            ## find the 4 code line and parse
-            if flag_4_code == 1:  ## means this line is code4 line
-                flag_4_code = 2  ## means have detected
-                code4 = [int(c) for c in line.strip().strip(",").strip('"').split()]
-                self.xpm_width, self.xpm_height = code4[0], code4[1]
-                self.xpm_color_num, self.xpm_char_per_pixel = code4[2], code4[3]
-                continue
-            elif (flag_4_code == 0) and line.startswith("static char"):
-                flag_4_code = 1  ## means next line is code4 line
-                continue
-
-            ## parse comments and axis parts
-            if line.startswith("/* x-axis"):
-                self.xpm_xaxis += [float(n) for n in line.strip().split()[2:-1]]
-                continue
-            elif line.startswith("/* y-axis"):
-                self.xpm_yaxis += [float(n) for n in line.strip().split()[2:-1]]
-                continue
-            elif line.startswith("/* title"):
-                self.xpm_title = line.strip().split('"')[1]
-                continue
-            elif line.startswith("/* legend"):
-                self.xpm_legend = line.strip().split('"')[1]
-                continue
-            elif line.startswith("/* x-label"):
-                self.xpm_xlabel = line.strip().split('"')[1]
-                continue
-            elif line.startswith("/* y-label"):
-                self.xpm_ylabel = line.strip().split('"')[1]
-                continue
-            elif line.startswith("/* type"):
-                self.xpm_type = line.strip().split('"')[1]
-                continue
-
-            items = line.strip().split()
-            ## for char-color-note part
-            if len(items) == 7 and items[1] == "c":
-                if len(items[0].strip('"')) == self.xpm_char_per_pixel:
-                    self.chars.append(items[0].strip('"'))
-                    self.colors.append(items[2])
-                    self.notes.append(items[5].strip('"'))
-                ## deal with blank
-                if len(items[0].strip('"')) < self.xpm_char_per_pixel:
-                    print("Warning -> space in char of line : {}".format(line))
-                    char_item = items[0].strip('"')
-                    self.chars.append(
-                        char_item + " " * (self.xpm_char_per_pixel - len(char_item))
-                    )
-                    self.colors.append(items[2])
-                    self.notes.append(items[5].strip('"'))
-                continue
-
-            ## for content part
-            if line.strip().startswith('"') == 1 and (
-                len(line.strip().strip(",").strip('"'))
-                == self.xpm_width * self.xpm_char_per_pixel
-            ):
-                self.xpm_datalines.append(line.strip().strip(",").strip('"'))
+        with open(xpmfile, "r") as fo:
+            for line in fo:
+                line = line.strip()
+                ## find the 4 code line and parse
+                if flag_4_code == 1:  ## means this line is code4 line
+                    flag_4_code = 2  ## means have detected
+                    code4 = [int(c) for c in line.strip().strip(",").strip('"').split()]
+                    self.xpm_width, self.xpm_height = code4[0], code4[1]
+                    self.xpm_color_num, self.xpm_char_per_pixel = code4[2], code4[3]
+                    continue
+                elif (flag_4_code == 0) and line.startswith("static char"):
+                    flag_4_code = 1  ## means next line is code4 line
+                    continue
+
+                ## parse comments and axis parts
+                if line.startswith("/* x-axis"):
+                    self.xpm_xaxis += [float(n) for n in line.strip().split()[2:-1]]
+                    continue
+                elif line.startswith("/* y-axis"):
+                    self.xpm_yaxis += [float(n) for n in line.strip().split()[2:-1]]
+                    continue
+                elif line.startswith("/* title"):
+                    self.xpm_title = line.strip().split('"')[1]
+                    continue
+                elif line.startswith("/* legend"):
+                    self.xpm_legend = line.strip().split('"')[1]
+                    continue
+                elif line.startswith("/* x-label"):
+                    self.xpm_xlabel = line.strip().split('"')[1]
+                    continue
+                elif line.startswith("/* y-label"):
+                    self.xpm_ylabel = line.strip().split('"')[1]
+                    continue
+                elif line.startswith("/* type"):
+                    self.xpm_type = line.strip().split('"')[1]
+                    continue
+
+                items = line.strip().split()
+                ## for char-color-note part
+                if len(items) == 7 and items[1] == "c":
+                    if len(items[0].strip('"')) == self.xpm_char_per_pixel:
+                        self.chars.append(items[0].strip('"'))
+                        self.colors.append(items[2])
+                        self.notes.append(items[5].strip('"'))
+                    ## deal with blank
+                    if len(items[0].strip('"')) < self.xpm_char_per_pixel:
+                        print("Warning -> space in char of line : {}".format(line))
+                        char_item = items[0].strip('"')
+                        self.chars.append(
+                            char_item + " " * (self.xpm_char_per_pixel - len(char_item))
+                        )
+                        self.colors.append(items[2])
+                        self.notes.append(items[5].strip('"'))
+                    continue
+
+                ## for content part
+                if line.strip().startswith('"') == 1 and (
+                    len(line.strip().strip(",").strip('"'))
+                    == self.xpm_width * self.xpm_char_per_pixel
+                ):
+                    self.xpm_datalines.append(line.strip().strip(",").strip('"'))
 
         ## check infos
         if len(self.chars) != len(self.colors) != len(self.notes) != self.xpm_color_num:
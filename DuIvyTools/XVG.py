@@ -16,14 +16,18 @@ This file is provided to you under GPLv2 License"""
 
 
 import os
+import re
 import sys
+import json
+import mmap
+import hashlib
 import argparse
+import functools
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import scipy.stats as stats
 from cycler import cycler
-import matplotlib.pyplot as plt
-from matplotlib import pylab as pylab
-from matplotlib import colors
+import matplotlib
 import matplotlib.colors as mplcolors
 
 
@@ -64,12 +68,139 @@ myparams = {
         ],
     ),
 }
-pylab.rcParams.update(myparams)
 
-style_files = [file for file in os.listdir() if file[-9:] == ".mplstyle"]
-if len(style_files) >= 1:
-    plt.style.use(style_files[0])
-    print("Info -> using matplotlib style sheet from {}".format(style_files[0]))
+## the first line which is not blank, comment (#, &) or metadata (@)
+_data_line_pattern = re.compile(rb"^[ \t]*[^@#&\s]", re.M)
+## the title, axis labels and legends in metadata lines, with quotes stripped
+_header_pattern = re.compile(
+    r"^[ \t]*@[ \t]*(title|xaxis[ \t]+label|yaxis[ \t]+label|s\d+[ \t]+legend)"
+    r'[ \t]+"?(.*?)"?[ \t\r]*$',
+    re.M,
+)
+
+## parsed xvg files are cached here, set DUIVY_NO_CACHE to disable caching
+_cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "duivy")
+_cache_version = 2
+## only the most recently used entries are kept in cache, up to a number
+## of entries and a total size, larger xvg files are not cached
+_cache_max_entries = 32
+_cache_max_bytes = 256 * 1024 * 1024
+
+
+def _remove_files(files: list) -> None:
+    """remove files, the ones already removed are ignored"""
+
+    for file in files:
+        try:
+            os.remove(file)
+        except OSError:
+            pass
+
+
+def _prune_cache() -> None:
+    """remove the least recently used entries beyond the number and size limits"""
+
+    ## group the sidecars and data by entry, an entry missing one of them
+    ## (e.g. a failed write) is pruned like the others
+    entries = {}
+    for file in os.listdir(_cache_dir):
+        name, suffix = os.path.splitext(file)
+        if suffix not in [".json", ".npz"]:
+            continue
+        path = os.path.join(_cache_dir, file)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        mtime, size, files = entries.get(name, (0, 0, []))
+        entries[name] = (max(mtime, stat.st_mtime), size + stat.st_size, files + [path])
+
+    total_bytes = 0
+    entries = sorted(entries.values(), key=lambda entry: entry[0], reverse=True)
+    for index, (_, size, files) in enumerate(entries):
+        total_bytes += size
+        if index >= _cache_max_entries or total_bytes > _cache_max_bytes:
+            _remove_files(files)
+
+
+## backends of matplotlib which can not display figures
+_file_backends = {"agg", "cairo", "pdf", "pgf", "ps", "svg", "template"}
+
+
+@functools.lru_cache(maxsize=1)
+def _configure_plot():
+    """import pyplot only when drawing, apply myparams and style sheet once"""
+
+    ## set DUIVY_NO_GUI to use the non-interactive backend, a backend chosen
+    ## by MPLBACKEND or an already imported pyplot is left untouched
+    if (
+        "DUIVY_NO_GUI" in os.environ
+        and "MPLBACKEND" not in os.environ
+        and "matplotlib.pyplot" not in sys.modules
+    ):
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.rcParams.update(myparams)
+    style_files = [file for file in os.listdir() if file[-9:] == ".mplstyle"]
+    if len(style_files) >= 1:
+        plt.style.use(style_files[0])
+        print("Info -> using matplotlib style sheet from {}".format(style_files[0]))
+    return plt
+
+
+def _show_figure() -> None:
+    """show the figure, skipped on backends which can only write files"""
+
+    plt = _configure_plot()
+    if plt.get_backend().lower() in _file_backends:
+        print("Info -> no figure shown with non-interactive backend")
+        return
+    plt.show()
+
+
+@functools.lru_cache(maxsize=32)
+def _z_score(confidence: float) -> float:
+    """the z-score of two-sided confidence interval of normal distribution"""
+    return stats.norm.ppf((1.0 + confidence) / 2.0)
+
+
+## the number of window values reduced at once in _mvave_column
+_mvave_block_size = 1 << 22
+
+
+def _mvave_column(column: np.ndarray, windowsize: int, z: float) -> tuple:
+    """
+    calculate the moving average of one column and its interval
+
+    :parameters:
+        column: the data column
+        windowsize: the window size for calculating moving average
+        z: the z-score of the confidence interval
+
+    :return:
+        mv_ave: the moving average, NaN for the first windowsize rows
+        high: the high value of interval of moving average
+        low: the low value of interval of moving average
+    """
+
+    ## the window of row i is column[i - windowsize : i], averages and stds
+    ## are reduced over the windows directly, prefix sums lose precision on
+    ## trending data. Windows are handled in blocks to bound the temporaries
+    values = np.asarray(column, dtype=np.float64)
+    windows = np.lib.stride_tricks.sliding_window_view(values, windowsize)[:-1]
+    ave = np.empty(len(windows))
+    std = np.empty(len(windows))
+    block = max(1, _mvave_block_size // windowsize)
+    for start in range(0, len(windows), block):
+        window_block = windows[start : start + block]
+        ave[start : start + block] = window_block.mean(axis=1)
+        std[start : start + block] = window_block.std(axis=1)
+    nans = np.full(windowsize, np.nan)
+    mv_ave = np.concatenate((nans, ave))
+    high = np.concatenate((nans, ave + z * std))
+    low = np.concatenate((nans, ave - z * std))
+    return mv_ave, high, low
 
 
 class XVG(object):
@@ -81,8 +212,9 @@ class XVG(object):
     xvg_xlabel: the x-label of xvg file
     xvg_ylabel: the y-label of xvg file
     xvg_legends: a list to store legends
-    xvg_columns: a list to store data
-    xvg_data: a dict to store data
+    xvg_text_columns: a list to store the rest columns in text
+    data_heads: a list to store the head of each data column
+    data_columns: a list to store each data column, views of one 2-D array
 
     Functions:
     __init__: read xvg file and extract infos
@@ -102,7 +234,10 @@ class XVG(object):
         self.xvg_legends = []
         self.xvg_column_num = 0
         self.xvg_row_num = 0
-        self.xvg_columns = []
+        self._data = None
+        self._col_min = None
+        self._col_max = None
+        self.xvg_text_columns = []
 
         self.data_heads = []
         self.data_columns = []
@@ -114,60 +249,132 @@ class XVG(object):
         if xvgfile[-4:] != ".xvg":
             print("Error -> specify a xvg file with suffix xvg")
             exit()
-        with open(xvgfile, "r") as fo:
-            lines = [line.strip() for line in fo.readlines() if line.strip() != ""]
-
-        ## extract data from xvg file content
-        for line in lines:
-            if line.startswith("#") or line.startswith("&"):
-                continue
-            elif line.startswith("@"):
-                if " title " in line:
-                    self.xvg_title = line.strip('"').split('"')[-1]
-                elif " xaxis " in line and " label " in line:
-                    self.xvg_xlabel = line.strip('"').split('"')[-1]
-                elif " yaxis " in line and " label " in line:
-                    self.xvg_ylabel = line.strip('"').split('"')[-1]
-                elif line.startswith("@ s") and " legend " in line:
-                    self.xvg_legends.append(line.strip('"').split('"')[-1])
+        if os.path.getsize(xvgfile) == 0:
+            print("Error -> no data line detected in xvg file")
+            exit()
+
+        ## skip parsing if the same file was read before
+        cache_path = None
+        if "DUIVY_NO_CACHE" not in os.environ:
+            cache_path = self._get_cache_path()
+            if self._load_cache(cache_path):
+                print("Info -> read {} from cache successfully. ".format(xvgfile))
+                return
+
+        with open(xvgfile, "rb") as fo, mmap.mmap(
+            fo.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            match = _data_line_pattern.search(mm)
+            data_offset = len(mm) if match == None else match.start()
+            header = mm[:data_offset].decode()
+            first_line_end = mm.find(b"\n", data_offset)
+            if first_line_end == -1:
+                first_line_end = len(mm)
+            self.xvg_column_num = len(mm[data_offset:first_line_end].split())
+            ## metadata lines may also follow data lines, like legends of later sets
+            metadata_lines = []
+            at = mm.find(b"@", data_offset)
+            while at != -1:
+                line_start = mm.rfind(b"\n", 0, at) + 1
+                line_end = mm.find(b"\n", at)
+                if line_end == -1:
+                    line_end = len(mm)
+                metadata_lines.append(mm[line_start:line_end].decode())
+                at = mm.find(b"@", line_end)
+            header = "\n".join([header] + metadata_lines)
+
+        ## extract infos from the metadata lines of xvg file
+        for match in _header_pattern.finditer(header):
+            key, value = match.group(1), match.group(2)
+            if key == "title":
+                self.xvg_title = value
+            elif key.startswith("xaxis"):
+                self.xvg_xlabel = value
+            elif key.startswith("yaxis"):
+                self.xvg_ylabel = value
             else:
-                ## extract the column data part
-                items = line.split()
-                if len(self.xvg_columns) == 0:
-                    self.xvg_columns = [[] for _ in range(len(items))]
-                    self.xvg_column_num = len(items)
-                    self.xvg_row_num = 0
-                if len(items) != len(self.xvg_columns):
-                    print(
-                        "Error -> the number of columns in {} is not equal. ".format(
-                            self.xvg_filename
-                        )
-                    )
-                    print("{} -> ".format(self.xvg_row_num) + line)
-                    exit()
-                for i in range(len(items)):
-                    self.xvg_columns[i].append(items[i])
-                self.xvg_row_num += 1
+                self.xvg_legends.append(value)
+        if self.xvg_column_num == 0:
+            print("Error -> no data line detected in xvg file")
+            exit()
 
-        ## post-process the infos
-        for c in range(self.xvg_column_num):
-            if len(self.xvg_columns[c]) != self.xvg_row_num:
-                print(
-                    "Error -> length of column {} if not equal to count of rows".format(
-                        c
+        ## columns paired with xlabel, ylabel or legends hold data,
+        ## the rest columns (like residue names) are kept as text
+        if len(self.xvg_legends) == 0:
+            data_column_num = min(self.xvg_column_num, 2)
+        elif self.xvg_column_num > len(self.xvg_legends):
+            data_column_num = len(self.xvg_legends) + 1
+        else:
+            data_column_num = 1
+
+        ## parse all data lines at once, straight from the file
+        comments = ("#", "&", "@")
+        try:
+            with open(xvgfile, "rb") as fo:
+                fo.seek(data_offset)
+                if data_column_num == self.xvg_column_num:
+                    data = np.loadtxt(fo, dtype=np.float64, comments=comments, ndmin=2)
+                else:
+                    ## parse data columns into float directly, only the rest as text
+                    data = np.loadtxt(
+                        fo,
+                        dtype=np.float64,
+                        comments=comments,
+                        usecols=range(data_column_num),
+                        ndmin=2,
                     )
-                )
-                exit()
-        if self.xvg_column_num == 0 or self.xvg_row_num == 0:
-            print("Error -> no data line detected in xvg file")
+                    fo.seek(data_offset)
+                    text = np.loadtxt(
+                        fo,
+                        dtype=str,
+                        comments=comments,
+                        usecols=range(data_column_num, self.xvg_column_num),
+                        ndmin=2,
+                    )
+                    self.xvg_text_columns = [column for column in text.T]
+        except ValueError as error:
+            print("Error -> failed to read data of {}".format(self.xvg_filename))
+            print("Error -> {}".format(error))
             exit()
 
+        ## store data column by column, each column is contiguous in memory
+        self._set_data(np.ascontiguousarray(data.T, dtype=np.float64))
+
+        ## post-process the infos
+        self._set_data_heads()
+
+        ## test
+        # print(self.xvg_title)
+        # print(self.xvg_xlabel)
+        # print(self.xvg_ylabel)
+        # print(self.xvg_legends)
+        # print(self.xvg_column_num)
+        # print(self.xvg_row_num)
+        # print(len(self.xvg_text_columns))
+        # print(self.data_heads)
+        # print(len(self.data_columns))
+
+        if cache_path != None:
+            self._save_cache(cache_path)
+        print("Info -> read {} successfully. ".format(self.xvg_filename))
+
+    def _set_data(self, data: np.ndarray) -> None:
+        """set the data array (columns x rows) and the infos derived from it"""
+
+        self._data = data
+        self.xvg_row_num = data.shape[1]
+        self.data_columns = [column for column in data]
+        self._col_min = data.min(axis=1)
+        self._col_max = data.max(axis=1)
+
+    def _set_data_heads(self) -> None:
+        """set the head of each data column from xlabel, ylabel and legends"""
+
+        self.data_heads = []
         self.data_heads.append(self.xvg_xlabel)
-        self.data_columns.append([float(c) for c in self.xvg_columns[0]])
-        if len(self.xvg_legends) == 0 and len(self.xvg_columns) > 1:
+        if len(self.xvg_legends) == 0 and self.xvg_column_num > 1:
             self.data_heads.append(self.xvg_ylabel)
-            self.data_columns.append([float(c) for c in self.xvg_columns[1]])
-        if len(self.xvg_legends) > 0 and len(self.xvg_columns) > len(self.xvg_legends):
+        if len(self.xvg_legends) > 0 and self.xvg_column_num > len(self.xvg_legends):
             items = [item.strip() for item in self.xvg_ylabel.split(",")]
             heads = [l for l in self.xvg_legends]
             if len(items) == len(self.xvg_legends):
@@ -185,21 +392,79 @@ class XVG(object):
                     "Warning -> failed to pair ylabel to legends, use legends in xvg file"
                 )
             self.data_heads += heads
-            for i in range(len(heads)):
-                self.data_columns.append([float(c) for c in self.xvg_columns[i + 1]])
 
-        ## test
-        # print(self.xvg_title)
-        # print(self.xvg_xlabel)
-        # print(self.xvg_ylabel)
-        # print(self.xvg_legends)
-        # print(self.xvg_column_num)
-        # print(self.xvg_row_num)
-        # print(len(self.xvg_columns))
-        # print(self.data_heads)
-        # print(len(self.data_columns))
+    def _get_cache_path(self) -> str:
+        """get the cache path (without suffix) from path, mtime and size of xvg file"""
 
-        print("Info -> read {} successfully. ".format(self.xvg_filename))
+        stat = os.stat(self.xvg_filename)
+        key = "{}|{}|{}|{}".format(
+            os.path.abspath(self.xvg_filename),
+            stat.st_mtime_ns,
+            stat.st_size,
+            _cache_version,
+        )
+        return os.path.join(_cache_dir, hashlib.sha1(key.encode()).hexdigest())
+
+    def _load_cache(self, cache_path: str) -> bool:
+        """load infos and data of xvg file from cache, return True if succeeded"""
+
+        if not (
+            os.path.exists(cache_path + ".json") and os.path.exists(cache_path + ".npz")
+        ):
+            return False
+        ## a broken cache is ignored and the xvg file will be parsed again
+        try:
+            with open(cache_path + ".json", "r") as fo:
+                infos = json.load(fo)
+            with np.load(cache_path + ".npz") as npz:
+                data, text = npz["data"], npz["text"]
+            self.xvg_title = infos["xvg_title"]
+            self.xvg_xlabel = infos["xvg_xlabel"]
+            self.xvg_ylabel = infos["xvg_ylabel"]
+            self.xvg_legends = infos["xvg_legends"]
+            self.xvg_column_num = infos["xvg_column_num"]
+        except Exception:
+            return False
+
+        ## mark the entry as recently used, so it is kept by _prune_cache
+        try:
+            os.utime(cache_path + ".json")
+        except OSError:
+            pass
+        self._set_data_heads()
+        self._set_data(data)
+        self.xvg_text_columns = [column for column in text]
+        return True
+
+    def _save_cache(self, cache_path: str) -> None:
+        """save infos and data of xvg file to cache"""
+
+        infos = {
+            "xvg_title": self.xvg_title,
+            "xvg_xlabel": self.xvg_xlabel,
+            "xvg_ylabel": self.xvg_ylabel,
+            "xvg_legends": self.xvg_legends,
+            "xvg_column_num": self.xvg_column_num,
+        }
+        text = np.array(self.xvg_text_columns, dtype=str).reshape(
+            len(self.xvg_text_columns), self.xvg_row_num
+        )
+        if self._data.nbytes + text.nbytes > _cache_max_bytes:
+            return
+        try:
+            os.makedirs(_cache_dir, exist_ok=True)
+            ## float data barely compresses, saving it raw is much faster
+            np.savez(cache_path + ".npz", data=self._data, text=text)
+            with open(cache_path + ".json", "w") as fo:
+                json.dump(infos, fo)
+            _prune_cache()
+        except OSError:
+            _remove_files([cache_path + ".npz", cache_path + ".json"])
+            print(
+                "Warning -> failed to cache {} in {}".format(
+                    self.xvg_filename, _cache_dir
+                )
+            )
 
     def calc_average(self, start: int = None, end: int = None) -> tuple:
         """
@@ -225,11 +490,8 @@ class XVG(object):
             )
             exit()
 
-        column_averages = []
-        column_stds = []
-        for column in self.data_columns:
-            column_averages.append(np.average(column[start:end]))
-            column_stds.append(np.std(column[start:end]))
+        column_averages = self._data[:, start:end].mean(axis=1).tolist()
+        column_stds = self._data[:, start:end].std(axis=1).tolist()
 
         return self.data_heads, column_averages, column_stds
 
@@ -255,22 +517,19 @@ class XVG(object):
             print("Error -> confidence value is not proper, it should be in (0,1)")
             exit()
 
-        column_mvaves, column_highs, column_lows = [], [], []
-        for column in self.data_columns:
-            mv_ave = [np.nan for _ in range(windowsize)]
-            high = [np.nan for _ in range(windowsize)]
-            low = [np.nan for _ in range(windowsize)]
-            for i in range(windowsize, self.xvg_row_num):
-                window_data = column[i - windowsize : i]
-                ave = np.mean(window_data)
-                std = np.std(window_data)
-                interval = stats.norm.interval(confidence, ave, std)
-                mv_ave.append(ave)
-                low.append(interval[0])
-                high.append(interval[1])
-            column_mvaves.append(mv_ave)
-            column_lows.append(low)
-            column_highs.append(high)
+        ## columns are independent and numpy releases the GIL, so use threads
+        mvave_column = functools.partial(
+            _mvave_column, windowsize=windowsize, z=_z_score(confidence)
+        )
+        workers = min(len(self.data_columns), os.cpu_count() or 1)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(mvave_column, self.data_columns))
+        else:
+            results = [mvave_column(column) for column in self.data_columns]
+        column_mvaves = [result[0] for result in results]
+        column_highs = [result[1] for result in results]
+        column_lows = [result[2] for result in results]
 
         return self.data_heads, column_mvaves, column_highs, column_lows
 
@@ -292,19 +551,23 @@ class XVG(object):
             print("Error -> already a {} in current directory".format(outcsv))
             exit()
 
-        ## write csv file
-        out_data = []
-        if len(self.data_columns) == len(self.xvg_columns):
-            out_data = [column for column in self.data_columns]
-        elif len(self.data_columns) < len(self.xvg_columns):
+        ## write csv file, "%s" keeps the shortest repr of each value
+        if len(self.xvg_text_columns) == 0:
+            np.savetxt(
+                outcsv,
+                self._data.T,
+                fmt="%s",
+                delimiter=",",
+                header=",".join(self.data_heads),
+                comments="",
+            )
+        else:
             out_data = [column for column in self.data_columns]
-            out_data += [
-                column for column in self.xvg_columns[len(self.data_columns) :]
-            ]
-        with open(outcsv, "w") as fo:
-            fo.write(",".join(self.data_heads) + "\n")
-            for row in range(self.xvg_row_num):
-                fo.write(",".join([str(column[row]) for column in out_data]) + "\n")
+            out_data += [column for column in self.xvg_text_columns]
+            with open(outcsv, "w") as fo:
+                fo.write(",".join(self.data_heads) + "\n")
+                for row in range(self.xvg_row_num):
+                    fo.write(",".join([str(column[row]) for column in out_data]) + "\n")
 
         print(
             "Info -> convert {} into {} successfully.".format(self.xvg_filename, outcsv)
@@ -319,29 +582,24 @@ class XVG(object):
             noshow: whether not to show figure in GUI.
         """
 
+        plt = _configure_plot()
         column_num = len(self.data_columns)
-        x_min = np.min(self.data_columns[0])
-        x_max = np.max(self.data_columns[0])
+        x_min = self._col_min[0]
+        x_max = self._col_max[0]
         x_space = int((x_max - x_min) / 100)
-        grid = (plt.GridSpec(1, column_num), plt.GridSpec(2, int(column_num / 2)))[
-            column_num > 2
-        ]
+        grid_column_num = column_num // 2
+        if column_num > 2:
+            grid = plt.GridSpec(2, grid_column_num)
+        else:
+            grid = plt.GridSpec(1, column_num)
         for i in range(1, column_num):
             ## use grid for subplots layout
+            grid_row = 1 if i - 1 >= grid_column_num else 0
+            grid_column = (i - 1) % grid_column_num
             if i == column_num - 1:
-                ax = plt.subplot(
-                    grid[
-                        (1, 0)[i - 1 < int((column_num) / 2)],
-                        (i - 1) % int((column_num) / 2) :,
-                    ]
-                )
+                ax = plt.subplot(grid[grid_row, grid_column:])
             else:
-                ax = plt.subplot(
-                    grid[
-                        (1, 0)[i - 1 < int((column_num) / 2)],
-                        (i - 1) % int((column_num) / 2),
-                    ]
-                )
+                ax = plt.subplot(grid[grid_row, grid_column])
             ax.plot(self.data_columns[0], self.data_columns[i])
             ax.set_ylabel(self.data_heads[i])
             plt.xlim(int(x_min - x_space), int(x_max + x_space))
@@ -355,7 +613,7 @@ class XVG(object):
                 exit()
             plt.savefig(outpng, dpi=300)
         if noshow == False:
-            plt.show()
+            _show_figure()
 
     def draw_distribution(
         self, bin: int = 100, outpng: str = "", noshow: bool = False
@@ -369,44 +627,32 @@ class XVG(object):
             noshow: whether not to show figure in GUI.
         """
 
+        plt = _configure_plot()
         column_num = len(self.data_columns)
-        grid = plt.GridSpec(2, int((column_num + 1) / 2))
+        grid_column_num = (column_num + 1) // 2
+        grid = plt.GridSpec(2, grid_column_num)
         for i in range(column_num):
             column = self.data_columns[i]
             ## calculate distribution
-            column_min = np.min(column)
-            column_max = np.max(column)
+            column_min = self._col_min[i]
+            column_max = self._col_max[i]
             bin_window = (column_max - column_min) / bin
             if bin_window != 0:
-                frequency = [0 for _ in range(bin)]
-                for value in column:
-                    index = int((value - column_min) / bin_window)
-                    if index == bin:  # for the column_max
-                        index = bin - 1
-                    frequency[index] += 1
-                if sum(frequency) != self.xvg_row_num:
-                    print("Error -> wrong in calculating distribution")
-                    exit()
-                frequency = [f * 100.0 / self.xvg_row_num for f in frequency]
-                x_value = [column_min + bin_window * b for b in range(bin)]
+                frequency, edges = np.histogram(
+                    column, bins=bin, range=(column_min, column_max)
+                )
+                frequency = frequency * (100.0 / self.xvg_row_num)
+                x_value = edges[:-1]
             else:  # for data without fluctuation
                 frequency = [1]
                 x_value = [column_min]
             ## draw distribution
+            grid_row = 1 if i >= grid_column_num else 0
+            grid_column = i % grid_column_num
             if i == column_num - 1:
-                ax = plt.subplot(
-                    grid[
-                        (1, 0)[i < int((column_num + 1) / 2)],
-                        i % int((column_num + 1) / 2) :,
-                    ]
-                )
+                ax = plt.subplot(grid[grid_row, grid_column:])
             else:
-                ax = plt.subplot(
-                    grid[
-                        (1, 0)[i < int((column_num + 1) / 2)],
-                        i % int((column_num + 1) / 2),
-                    ]
-                )
+                ax = plt.subplot(grid[grid_row, grid_column])
             # ax = plt.subplot(int((column_num+1)/2), 2, i+1)
             ax.plot(x_value, frequency)
             ax.set_xlabel(self.data_heads[i])
@@ -422,7 +668,7 @@ class XVG(object):
                 exit()
             plt.savefig(outpng, dpi=300)
         if noshow == False:
-            plt.show()
+            _show_figure()
 
     def draw_stacking(
         self,
@@ -482,35 +728,47 @@ class XVG(object):
             exit()
 
         ## draw stacked plot
+        plt = _configure_plot()
+        from matplotlib.collections import PolyCollection
+        from matplotlib.patches import Patch
+
         column_select.reverse()
         legend_list.reverse()
-        ylim_max, ylim_min = 0, 0
-        labels = (legend_list, [self.data_heads[c] for c in column_select])[
-            len(legend_list) == 0
+        if len(legend_list) != 0:
+            labels = legend_list
+        else:
+            labels = [self.data_heads[c] for c in column_select]
+        ## stack_data[i] is the sum of columns in column_select[i:]
+        stack_data = np.cumsum(self._data[column_select[::-1], start:end], axis=0)[::-1]
+        ## fill each stacked area down to 0, all areas in one collection
+        x_value = self.data_columns[0][start:end]
+        x_outline = np.concatenate((x_value, x_value[::-1]))
+        zeros = np.zeros(len(x_value))
+        polygons = [
+            np.column_stack((x_outline, np.concatenate((stack, zeros))))
+            for stack in stack_data
         ]
-        for index_id, _ in enumerate(column_select):
-            stack_data = [
-                sum([self.data_columns[c][row] for c in column_select[index_id:]])
-                for row in range(self.xvg_row_num)
-            ][start:end]
-            plt.fill_between(
-                self.data_columns[0][start:end],
-                stack_data,
-                [0 for _ in range(len(stack_data))],
-                label=labels[index_id],
-            )
-            ylim_max = (ylim_max, max(stack_data))[ylim_max < max(stack_data)]
-            ylim_min = (ylim_min, min(stack_data))[ylim_min > min(stack_data)]
+        cycle_colors = plt.rcParams["axes.prop_cycle"].by_key()["color"]
+        fill_colors = [
+            cycle_colors[index_id % len(cycle_colors)]
+            for index_id in range(len(column_select))
+        ]
+        plt.gca().add_collection(PolyCollection(polygons, facecolors=fill_colors))
+        ylim_max = max(0, stack_data.max())
+        ylim_min = min(0, stack_data.min())
         # print(ylim_min, ylim_max)
         plt.xlabel(self.data_heads[0])
         plt.ylabel(self.xvg_ylabel)
         plt.title("Stacked plot of " + self.xvg_title)
-        plt.xlim(
-            np.min(self.data_columns[0][start:end]),
-            np.max(self.data_columns[0][start:end]),
-        )
+        plt.xlim(x_value.min(), x_value.max())
         plt.ylim(ylim_min, ylim_max)
-        plt.legend(loc=3)
+        plt.legend(
+            handles=[
+                Patch(facecolor=color, label=label)
+                for color, label in zip(fill_colors, labels)
+            ],
+            loc=3,
+        )
 
         if outpng != None:
             if os.path.exists(outpng):
@@ -518,7 +776,7 @@ class XVG(object):
                 exit()
             plt.savefig(outpng, dpi=300)
         if noshow == False:
-            plt.show()
+            _show_figure()
 
     def draw_scatter(
         self,
@@ -542,13 +800,14 @@ class XVG(object):
             print("Warning -> x_index not in proper range, use default value.")
             x_index = 0
         if y_index == None:
-            y_index = (len(self.data_columns) - 1, 1)[len(self.data_columns) >= 2]
+            y_index = 1 if len(self.data_columns) >= 2 else 0
         else:
             if y_index >= len(self.data_columns) or y_index < 0:
                 print("Warning -> y_index not in proper range, use default value.")
-                y_index = (len(self.data_columns) - 1, 1)[len(self.data_columns) >= 2]
+                y_index = 1 if len(self.data_columns) >= 2 else 0
 
         ## draw scatter plot
+        plt = _configure_plot()
         plt.scatter(self.data_columns[x_index], self.data_columns[y_index])
         plt.ylabel(self.data_heads[y_index])
         plt.xlabel(self.data_heads[x_index])
@@ -563,7 +822,7 @@ class XVG(object):
                 exit()
             plt.savefig(outpng, dpi=300)
         if noshow == False:
-            plt.show()
+            _show_figure()
 
 
 def xvg_combine(
@@ -723,66 +982,35 @@ def energy_compute(xvgfiles: list = [], outfile: str = None):
     if not (prolig.xvg_row_num == pro.xvg_row_num == lig.xvg_row_num):
         print("Error -> {}, {}, {} should contain same number of rows.")
         exit()
-    if not (prolig.data_columns[0] == pro.data_columns[0] == lig.data_columns[0]):
+    if not (
+        np.array_equal(prolig.data_columns[0], pro.data_columns[0])
+        and np.array_equal(prolig.data_columns[0], lig.data_columns[0])
+    ):
         print("Error -> the Time axis may not be the same, check the interval of time.")
         exit()
 
-    ## compute the bingding energy
+    ## compute the bingding energy into one preallocated array
     ## time
-    out_data = [prolig.data_columns[0]] + [[] for _ in range(9)]
+    out_data = np.empty((10, prolig.xvg_row_num))
+    out_data[0] = prolig.data_columns[0]
     out_heads = (
         [prolig.data_heads[0]]
         + [head for head in prolig.xvg_legends]
         + ["LJ(all)", "Coulomb(all)", "Short-Range", "Long-Range", "Total Energy"]
     )
-    ## LJ(SR)
-    out_data[1] = [
-        prolig.data_columns[1][row]
-        - pro.data_columns[1][row]
-        - lig.data_columns[1][row]
-        for row in range(prolig.xvg_row_num)
-    ]
-    ## Disper.corr.
-    out_data[2] = [
-        prolig.data_columns[2][row]
-        - pro.data_columns[2][row]
-        - lig.data_columns[2][row]
-        for row in range(prolig.xvg_row_num)
-    ]
-    ## Coulomb(SR)
-    out_data[3] = [
-        prolig.data_columns[3][row]
-        - pro.data_columns[3][row]
-        - lig.data_columns[3][row]
-        for row in range(prolig.xvg_row_num)
-    ]
-    ## Coul.recip.
-    out_data[4] = [
-        prolig.data_columns[4][row]
-        - pro.data_columns[4][row]
-        - lig.data_columns[4][row]
-        for row in range(prolig.xvg_row_num)
-    ]
+    ## LJ(SR), Disper.corr., Coulomb(SR), Coul.recip.
+    np.subtract(prolig._data[1:5], pro._data[1:5], out=out_data[1:5])
+    out_data[1:5] -= lig._data[1:5]
     ## LJ(all)
-    out_data[5] = [
-        out_data[1][row] + out_data[2][row] for row in range(prolig.xvg_row_num)
-    ]
+    np.add(out_data[1], out_data[2], out=out_data[5])
     ## Coulomb(all)
-    out_data[6] = [
-        out_data[3][row] + out_data[4][row] for row in range(prolig.xvg_row_num)
-    ]
+    np.add(out_data[3], out_data[4], out=out_data[6])
     ## Short-Range
-    out_data[7] = [
-        out_data[1][row] + out_data[3][row] for row in range(prolig.xvg_row_num)
-    ]
+    np.add(out_data[1], out_data[3], out=out_data[7])
     ## Long-Range
-    out_data[8] = [
-        out_data[2][row] + out_data[4][row] for row in range(prolig.xvg_row_num)
-    ]
+    np.add(out_data[2], out_data[4], out=out_data[8])
     ## Total Energy
-    out_data[9] = [
-        out_data[5][row] + out_data[6][row] for row in range(prolig.xvg_row_num)
-    ]
+    np.add(out_data[5], out_data[6], out=out_data[9])
 
     ## write energy computation results
     with open(outfile, "w") as fo:
@@ -796,11 +1024,7 @@ def energy_compute(xvgfiles: list = [], outfile: str = None):
         fo.write("@ legend 0.78, 0.8\n@ legend length 9\n")
         for s in range(1, 10):
             fo.write('@ s{} legend "{}"\n'.format(s - 1, out_heads[s]))
-        for row in range(prolig.xvg_row_num):
-            fo.write(
-                " ".join(["{:>16.6f}".format(out_data[i][row]) for i in range(10)])
-                + "\n"
-            )
+        np.savetxt(fo, out_data.T, fmt="%16.6f", delimiter=" ")
 
     print(
         "Info -> energy computation through {}, {} and {} sucessfully.".format(
@@ -828,7 +1052,7 @@ def xvg_ramachandran(xvgfile: str = "", outpng: str = "", noshow: bool = False)
 
     ## check column number
     if (
-        len(xvg.xvg_columns) != 3
+        xvg.xvg_column_num != 3
         or len(xvg.data_columns) != 2
         or (xvg.data_heads[0] != "Phi" or xvg.data_heads[1] != "Psi")
     ):
@@ -868,30 +1092,24 @@ def xvg_ramachandran(xvgfile: str = "", outpng: str = "", noshow: bool = False)
         data_file_path = os.path.realpath(
             os.path.join(os.getcwd(), os.path.dirname(__file__))
         )
-        rama_pref_values[key] = [[0 for _ in range(361)] for _ in range(361)]
-        with open(os.path.join(data_file_path, val["file"]), "r") as fn:
-            for line in fn:
-                if line.startswith("#"):
-                    continue
-                else:
-                    phi = int(float(line.split()[0]))
-                    psi = int(float(line.split()[1]))
-                    ## plt.imshow show transpose of img
-                    rama_pref_values[key][psi + 180][phi + 180] = float(line.split()[2])
-                    rama_pref_values[key][psi + 179][phi + 180] = float(line.split()[2])
-                    rama_pref_values[key][psi + 180][phi + 179] = float(line.split()[2])
-                    rama_pref_values[key][psi + 179][phi + 179] = float(line.split()[2])
+        rama_pref_values[key] = np.zeros((361, 361))
+        pref_data = np.loadtxt(os.path.join(data_file_path, val["file"]), ndmin=2)
+        phi = pref_data[:, 0].astype(int) + 180
+        psi = pref_data[:, 1].astype(int) + 180
+        ## plt.imshow show transpose of img
+        for psi_shift, phi_shift in [(0, 0), (-1, 0), (0, -1), (-1, -1)]:
+            rama_pref_values[key][psi + psi_shift, phi + phi_shift] = pref_data[:, 2]
 
     normals, outliers = {}, {}
     for key in rama_preferences.keys():
         normals[key] = {"phi": [], "psi": []}
         outliers[key] = {"phi": [], "psi": []}
     for row in range(xvg.xvg_row_num):
-        if row < xvg.xvg_row_num - 1 and "PRO" in xvg.xvg_columns[2][row + 1]:
+        if row < xvg.xvg_row_num - 1 and "PRO" in xvg.xvg_text_columns[0][row + 1]:
             AA_type = "Pre-PRO"
-        elif "PRO" in xvg.xvg_columns[2][row]:
+        elif "PRO" in xvg.xvg_text_columns[0][row]:
             AA_type = "PRO"
-        elif "GLY" in xvg.xvg_columns[2][row]:
+        elif "GLY" in xvg.xvg_text_columns[0][row]:
             AA_type = "GLY"
         else:
             AA_type = "General"
@@ -921,6 +1139,7 @@ def xvg_ramachandran(xvgfile: str = "", outpng: str = "", noshow: bool = False)
         )
 
     ## draw ramachandran plot
+    plt = _configure_plot()
     for key in ["General", "GLY", "Pre-PRO", "PRO"]:
         if len(normals[key]["phi"]) + len(outliers[key]["phi"]) == 0:
             continue
@@ -929,7 +1148,7 @@ def xvg_ramachandran(xvgfile: str = "", outpng: str = "", noshow: bool = False)
         plt.imshow(
             rama_pref_values[key],
             cmap=rama_preferences[key]["cmap"],
-            norm=colors.BoundaryNorm(
+            norm=mplcolors.BoundaryNorm(
                 rama_preferences[key]["bounds"], rama_preferences[key]["cmap"].N
             ),
             extent=(-180, 180, 180, -180),
@@ -949,7 +1168,7 @@ def xvg_ramachandran(xvgfile: str = "", outpng: str = "", noshow: bool = False)
                 exit()
             plt.savefig(outpng.split(".")[0] + "_" + key + ".png", dpi=300)
         if noshow == False:
-            plt.show()
+            _show_figure()
 
 
 def xvg_compare(
@@ -1031,6 +1250,7 @@ def xvg_compare(
         exit()
 
     ## draw comparison
+    plt = _configure_plot()
     XVGS = [XVG(xvg) for xvg in xvgfiles]
     legend_count, xmin, xmax = 0, None, None
     for id, column_indexs in enumerate(column_select):
@@ -1047,37 +1267,31 @@ def xvg_compare(
             xlabel = xvg.xvg_xlabel
         if ylabel == None:
             ylabel = xvg.xvg_ylabel
+        x_value = xvg.data_columns[0][start:end]
+        x_min, x_max = np.min(x_value), np.max(x_value)
         for index in column_indexs:
             if len(legend_list) != 0:
                 legend = legend_list[legend_count]
             else:
                 legend = "{} of {}".format(xvg.data_heads[index], xvg.xvg_filename)
             legend_count += 1
-            if xmin == None:
-                xmin = min(xvg.data_columns[0][start:end])
-            if xmax == None:
-                xmax = max(xvg.data_columns[0][start:end])
-            xmin = (min(xvg.data_columns[0][start:end]), xmin)[
-                xmin < min(xvg.data_columns[0][start:end])
-            ]
-            xmax = (max(xvg.data_columns[0][start:end]), xmax)[
-                xmax > max(xvg.data_columns[0][start:end])
-            ]
+            xmin = x_min if xmin == None else min(xmin, x_min)
+            xmax = x_max if xmax == None else max(xmax, x_max)
             if showMV == True:
                 plt.fill_between(
-                    xvg.data_columns[0][start:end],
+                    x_value,
                     highs[index][start:end],
                     lows[index][start:end],
                     alpha=alpha,
                 )
                 plt.plot(
-                    xvg.data_columns[0][start:end],
+                    x_value,
                     mvaves[index][start:end],
                     label=legend,
                 )
             else:
                 plt.plot(
-                    xvg.data_columns[0][start:end],
+                    x_value,
                     xvg.data_columns[index][start:end],
                     label=legend,
                 )
@@ -1092,7 +1306,7 @@ def xvg_compare(
             exit()
         plt.savefig(outpng, dpi=300)
     if noshow == False:
-        plt.show()
+        _show_figure()
 
 
 def xvg_bar_compare(
@@ -1224,6 +1438,7 @@ def xvg_bar_compare(
                 fo.write("\n")
 
     ## draw bar figure
+    plt = _configure_plot()
     width = 80 // len(xvgfiles) * 0.01
     x_loc = [x - 0.4 + width / 2.0 for x in range(len(column_list))]
     for i in range(len(final_averages)):
@@ -1247,7 +1462,7 @@ def xvg_bar_compare(
             exit()
         plt.savefig(output, dpi=300)
     if noshow == False:
-        plt.show()
+        _show_figure()
 
 
 def xvg_box_compare(
@@ -1307,6 +1522,7 @@ def xvg_box_compare(
         exit()
 
     ## draw bar comparison
+    plt = _configure_plot()
     XVGS = [XVG(xvg) for xvg in xvgfiles]
     box_data, positions_list = [], []
     width = 80 // len(xvgfiles) * 0.01
@@ -1334,7 +1550,7 @@ def xvg_box_compare(
             exit()
         plt.savefig(outpng, dpi=300)
     if noshow == False:
-        plt.show()
+        _show_figure()
 
 
 def xvg_calc_ave(file: str = None, start: int = None, end: int = None) -> None:
@@ -1533,7 +1749,7 @@ def xvg_call_functions(arguments: list = None):
         else:
             ## ~~ Is used to reprensent space
             legend_list = [l.replace("~~", " ") for l in args.legend_list]
-    firstfile = (xvgfiles[0], xvgfiles[0][0])[isinstance(xvgfiles[0], list)]
+    firstfile = xvgfiles[0][0] if isinstance(xvgfiles[0], list) else xvgfiles[0]
 
     ## call functions
     if method == "xvg_ave":